@@ -0,0 +1,149 @@
+import numpy as np
+from numba import njit, prange, get_num_threads
+
+# -----------------------------
+# Union-Find helpers
+# -----------------------------
+@njit(cache=True)
+def find(parent, x):
+    """
+    Find the root of x with path halving.
+
+    Args:
+        parent (np.ndarray): Union-find parent array.
+        x (int): Provisional label.
+
+    Returns:
+        int: Root label of x.
+    """
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+@njit(cache=True)
+def union(parent, a, b):
+    """
+    Merge the sets containing a and b; the smaller root becomes the parent.
+
+    Args:
+        parent (np.ndarray): Union-find parent array.
+        a (int): Provisional label.
+        b (int): Provisional label.
+
+    Returns:
+        int: Root label of the merged set.
+    """
+    ra = find(parent, a)
+    rb = find(parent, b)
+    if ra < rb:
+        parent[rb] = ra
+        return ra
+    parent[ra] = rb
+    return rb
+
+
+# -----------------------------
+# Strip-wise first pass
+# -----------------------------
+@njit(cache=True)
+def _label_strip(binary, parent, r0, r1):
+    """
+    Provisional labelling of rows [r0, r1) without looking above row r0.
+    Pixel (r, c) gets label r * ncols + c + 1, so strips never collide.
+    """
+    ncols = binary.shape[1]
+    for r in range(r0, r1):
+        for c in range(ncols):
+            idx = r * ncols + c + 1
+            if binary[r, c] == 0:
+                parent[idx] = 0
+                continue
+
+            parent[idx] = idx
+            # Already visited 8-neighbours: W, NW, N, NE
+            if c > 0 and binary[r, c - 1]:
+                union(parent, idx, idx - 1)
+            if r > r0:
+                up = idx - ncols
+                if c > 0 and binary[r - 1, c - 1]:
+                    union(parent, idx, up - 1)
+                if binary[r - 1, c]:
+                    union(parent, idx, up)
+                if c < ncols - 1 and binary[r - 1, c + 1]:
+                    union(parent, idx, up + 1)
+
+
+# -----------------------------
+# 8-connected labelling
+# -----------------------------
+def label_8conn(binary, out=None, parent=None):
+    """
+    Two-pass, strip-parallel 8-connected component labelling.
+
+    Rows are split into one strip per thread and labelled independently;
+    the strip seams are then merged and labels flattened to 1..n.
+
+    Args:
+        binary (np.ndarray): 2-D mask (0 = background).
+        out (np.ndarray, optional): Integer array to write labels into.
+        parent (np.ndarray, optional): int32 work array of at least
+            binary.size + 1 elements, reused instead of allocating one.
+
+    Returns:
+        (np.ndarray, int): intp label image (0 = background) and label count.
+    """
+    binary = np.ascontiguousarray(binary, dtype=np.uint8)
+    n_strips = min(get_num_threads(), max(binary.shape[0], 1))
+    if out is None:
+        out = np.empty(binary.shape, dtype=np.intp)
+    if parent is None:
+        parent = np.empty(binary.size + 1, dtype=np.int32)
+    n_labels = _label_8conn(binary, n_strips, out, parent[:binary.size + 1])
+    return out, n_labels
+
+
+@njit(parallel=True, cache=True)
+def _label_8conn(binary, n_strips, labels, parent):
+    nrows, ncols = binary.shape
+    parent[0] = 0
+
+    # 1) Provisional labels, one strip per thread
+    strip = (nrows + n_strips - 1) // n_strips
+    for s in prange(n_strips):
+        r0 = s * strip
+        r1 = min(r0 + strip, nrows)
+        _label_strip(binary, parent, r0, r1)
+
+    # 2) Merge across strip seams
+    for s in range(1, n_strips):
+        r = s * strip
+        if r >= nrows:
+            break
+        for c in range(ncols):
+            if binary[r, c] == 0:
+                continue
+            idx = r * ncols + c + 1
+            up = idx - ncols
+            if c > 0 and binary[r - 1, c - 1]:
+                union(parent, idx, up - 1)
+            if binary[r - 1, c]:
+                union(parent, idx, up)
+            if c < ncols - 1 and binary[r - 1, c + 1]:
+                union(parent, idx, up + 1)
+
+    # 3) Flatten to dense labels; parents always point to lower indices
+    n_labels = 0
+    for i in range(1, parent.shape[0]):
+        if parent[i] < i:
+            parent[i] = parent[parent[i]]
+        else:
+            n_labels += 1
+            parent[i] = n_labels
+
+    for r in prange(nrows):
+        for c in range(ncols):
+            labels[r, c] = parent[r * ncols + c + 1]
+
+    return n_labels
@@ -0,0 +1 @@
+# Lets pytest import the top-level modules (ccl, filter, ...) from tests/.
@@ -1,9 +1,19 @@
 import datetime
+import functools
 
+# Offsets for the default call (post-flood start, reference window)
+_ONE_DAY = datetime.timedelta(days=1)
+_DEFAULT_BEFORE_START = datetime.timedelta(days=30)
+_DEFAULT_BEFORE_END = datetime.timedelta(days=1)
+
+
+@functools.lru_cache(maxsize=256)
 def get_date_ranges(event_date_str, post_lag, days_before_start=30, days_before_end=1):
     """
     Compute post-flood and reference date ranges from a flood event date.
 
+    Results are cached, so repeated calls for the same event are free.
+
     Args:
         event_date_str (str): Flood event date in 'YYYY-MM-DD' format.
         post_lag (int): Number of days after the flood to include in post-flood analysis.
@@ -13,21 +23,23 @@ def get_date_ranges(event_date_str, post_lag, days_before_start=30, days_before_
     Returns:
         (str, str, str, str): post_start_date, post_end_date, ref_start_date, ref_end_date
     """
+    event_date = datetime.date.fromisoformat(event_date_str)
 
-    def parse(date_str):
-        return datetime.datetime.strptime(date_str, '%Y-%m-%d')
-
-    def format(date_obj):
-        return date_obj.strftime('%Y-%m-%d')
-
-    event_date = parse(event_date_str)
+    before_start = (
+        _DEFAULT_BEFORE_START if days_before_start == 30
+        else datetime.timedelta(days=days_before_start)
+    )
+    before_end = (
+        _DEFAULT_BEFORE_END if days_before_end == 1
+        else datetime.timedelta(days=days_before_end)
+    )
 
     # Post-flood range
-    post_start_date = format(event_date + datetime.timedelta(days=1))
-    post_end_date = format(event_date + datetime.timedelta(days=post_lag))
+    post_start_date = (event_date + _ONE_DAY).isoformat()
+    post_end_date = (event_date + datetime.timedelta(days=post_lag)).isoformat()
 
     # Reference range
-    ref_start_date = format(event_date - datetime.timedelta(days=days_before_start))
-    ref_end_date = format(event_date - datetime.timedelta(days=days_before_end))
+    ref_start_date = (event_date - before_start).isoformat()
+    ref_end_date = (event_date - before_end).isoformat()
 
     return post_start_date, post_end_date, ref_start_date, ref_end_date
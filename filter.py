@@ -1,5 +1,9 @@
 import ee
 
+# Largest patch size Earth Engine's connected-component ops can measure
+_EE_MAX_PATCH = 1024
+
+
 # -----------------------------
 # Remove Small Flood Areas
 # -----------------------------
@@ -15,6 +19,11 @@ def remove_small_area(mask_collection, roi, min_area):
 
     Returns:
         ee.ImageCollection: Cleaned flood images with 'depth' band.
+
+    Note:
+        Earth Engine cannot label patches above 1024 pixels, so those are
+        always kept. For larger thresholds use sieve.remove_small_area_local
+        on the downloaded raster.
     """
     def process_image(image):
         date = image.get('date')
@@ -22,13 +31,18 @@ def remove_small_area(mask_collection, roi, min_area):
         # Convert area to pixel count (10m resolution = 100 m²/pixel)
         min_pixels = ee.Number(min_area).divide(100).round()
 
-        # Count connected pixels in each flood patch
-        patch_sizes = image.connectedPixelCount(
-            maxSize=128, eightConnected=True
+        # Label flood patches (8-connected) and count pixels per patch
+        labeled = image.selfMask().connectedComponents(
+            connectedness=ee.Kernel.square(1), maxSize=_EE_MAX_PATCH
+        )
+        patch_sizes = labeled.reduceConnectedComponents(
+            reducer=ee.Reducer.count(), labelBand='labels', maxSize=_EE_MAX_PATCH
         )
 
-        # Mask out small patches
-        cleaned = image.updateMask(patch_sizes.gte(min_pixels)).clip(roi)
+        # Mask out small patches; patches too large to label come back
+        # masked, so they are kept via unmask(1)
+        keep = patch_sizes.gte(min_pixels).unmask(1)
+        cleaned = image.updateMask(keep).clip(roi)
 
         # Convert flood pixels to depth = 1
         depth = cleaned.rename('depth').selfMask().toFloat()
@@ -51,11 +65,6 @@ def mask_clouds(img):
     Returns:
         ee.Image: Single-band mask image ('cloud_mask').
     """
-    scl = img.select('SCL')
-
-    cloud_shadow = scl.eq(3)
-    cloud = scl.eq(8)
-    cirrus = scl.eq(9)
-
-    cloud_mask = cloud_shadow.Or(cloud).Or(cirrus).rename('cloud_mask')
+    # SCL classes: 3 = cloud shadow, 8 = cloud, 9 = cirrus
+    cloud_mask = img.select('SCL').remap([3, 8, 9], [1, 1, 1], 0).rename('cloud_mask')
     return cloud_mask.copyProperties(img, img.propertyNames())
@@ -2,14 +2,17 @@ import ee
 # -----------------------------
 # Sentinel-2 Mosaic by Date
 # -----------------------------
-def mosaic_s2(collection, roi):
+def mosaic_s2(collection, roi, coverage_tolerance=0.001):
     """
     Mosaic Sentinel-2 images by acquisition date using median.
-    Keeps only mosaics that fully cover the ROI.
+    Keeps only mosaics that fully cover the ROI; the measured covered
+    fraction is stored as 'coverage_ratio'.
 
     Args:
         collection (ee.ImageCollection): Sentinel-2 image collection.
         roi (ee.Geometry): Region of interest.
+        coverage_tolerance (float): Fraction of the ROI area allowed to be
+            uncovered before a mosaic is dropped (default 0.001).
 
     Returns:
         ee.ImageCollection: One mosaicked image per date (with full ROI coverage).
@@ -19,27 +22,45 @@ def mosaic_s2(collection, roi):
         return img.set('date', date)
 
     collection = collection.map(add_date)
-    unique_dates = collection.aggregate_array('date').distinct()
 
-    def mosaic_on_date(date):
-        date = ee.String(date)
-        daily = collection.filter(ee.Filter.eq('date', date))
-        merged_geometry = daily.geometry().dissolve()
-        covers = merged_geometry.contains(roi, ee.ErrorMargin(10))
+    # Group images by date server-side: one primary image per date,
+    # with all same-day images attached under 'matches'
+    joined = ee.Join.saveAll('matches').apply(
+        primary=collection.distinct('date'),
+        secondary=collection,
+        condition=ee.Filter.equals(leftField='date', rightField='date')
+    )
+
+    # Per-date metadata, built once for all dates: date -> properties
+    counts = ee.Dictionary(collection.aggregate_histogram('date'))
+    dates = counts.keys()
+    date_metadata = ee.Dictionary.fromLists(dates, dates.map(lambda d: ee.Dictionary({
+        'date': d,
+        'system:time_start': ee.Date(d).millis(),
+        'image_count': counts.get(d)
+    })))
+
+    roi_area = roi.area(10)
+
+    def mosaic_on_date(img):
+        date = ee.String(img.get('date'))
+        daily = ee.ImageCollection.fromImages(img.get('matches'))
 
         mosaic = daily.median().clip(roi)
-        metadata = {
-            'date': date,
-            'system:time_start': ee.Date(date).millis(),
-            'coverage': 'full',
-            'image_count': daily.size()
-        }
-
-        return ee.Algorithms.If(
-            covers,
-            mosaic.set(metadata),
-            None
-        )
-
-    mosaics = ee.List(unique_dates.map(mosaic_on_date)).removeAll([None])
-    return ee.ImageCollection(mosaics)
+
+        # Area of the ROI with valid data in every band
+        valid = mosaic.mask().reduce(ee.Reducer.min())
+        covered_area = ee.Image.pixelArea().updateMask(valid).reduceRegion(
+            reducer=ee.Reducer.sum(),
+            geometry=roi,
+            scale=30,
+            maxPixels=1e10
+        ).getNumber('area')
+
+        metadata = ee.Dictionary(date_metadata.get(date))
+
+        return mosaic.set(metadata).set('coverage_ratio', covered_area.divide(roi_area))
+
+    # Keep full-coverage mosaics with one collection-level filter
+    mosaics = ee.ImageCollection(joined).map(mosaic_on_date)
+    return mosaics.filter(ee.Filter.gte('coverage_ratio', 1 - coverage_tolerance))
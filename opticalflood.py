@@ -4,6 +4,8 @@ Unified optical flood mapping utilities.
 
 Includes:
   * opticflood_s2: Sentinel-2 pipeline in Earth Engine (server-side).
+  * export_flood_collection: store an opticflood_s2 result as an EE asset.
+  * opticflood_s2_fetch: parallel download of the S2 flood masks as NumPy arrays.
   * opticflood_sk_local: SkySat pipeline fully local (no EE assets).
 
 Assumptions:
@@ -11,13 +13,13 @@ Assumptions:
       from upload import load_s2_collection, get_permanent_water
       from date_utilize import get_date_ranges
       from filter import mask_clouds, remove_small_area   # EE variant
-      from threshold import classify_kmeans               # EE variant
+      from threshold import kmeans_threshold              # EE variant
       from mosaic import mosaic_s2
       from rename import add_layer_name
 
-  - For the local SkySat path, you also have NumPy-based helpers
-    named classify_kmeans and remove_small_area, OR you will pass
-    callable overrides via the function parameters.
+  - For the local SkySat path, the NumPy-based helpers are:
+      from sieve import remove_small_area_local, sieve_merge_neighbors
+      from threshold import quantize_ndwi, ndwi_histogram, quantized_otsu_threshold
 
 Author: you + a bit of tidy glue ✨
 """
@@ -25,7 +27,14 @@ Author: you + a bit of tidy glue ✨
 # -----------------------
 # Common / EE side imports
 # -----------------------
+import datetime
+import hashlib
+import json
+import math
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict, List, Optional
 
 import ee
@@ -34,7 +43,10 @@ import ee
 from upload import load_s2_collection, get_permanent_water
 from date_utilize import get_date_ranges
 from filter import mask_clouds, remove_small_area  # EE-based version
-from threshold import classify_kmeans              # EE-based version
+from sieve import remove_small_area_local, sieve_merge_neighbors  # local version
+from threshold import kmeans_threshold             # EE-based version
+from threshold import NDWI_LEVELS, quantize_ndwi, ndwi_histogram  # local version
+from threshold import quantized_otsu_threshold                  # local version
 from mosaic import mosaic_s2
 from rename import add_layer_name
 
@@ -43,7 +55,7 @@ from rename import add_layer_name
 # -----------------------
 import numpy as np
 import rasterio
-from rasterio.mask import mask as rio_mask
+from rasterio import features, windows
 from rasterio.enums import Resampling
 
 
@@ -58,6 +70,126 @@ def _ensure_ee_initialized():
         ee.Initialize()
 
 
+# =========================================================
+# Materialize a flood collection once as an EE asset
+# =========================================================
+def _asset_images(asset_id: str) -> List[str]:
+    """Names (last path part) of the images stored in an ImageCollection asset ([] if missing)."""
+    try:
+        listing = ee.data.listAssets({"parent": asset_id})
+    except ee.EEException:
+        return []
+    return [
+        a["name"].rsplit("/", 1)[-1]
+        for a in listing.get("assets", [])
+        if a.get("type") == "IMAGE"
+    ]
+
+
+def _asset_properties(asset_id: str) -> Optional[Dict]:
+    """Properties of an asset, or None if it does not exist."""
+    try:
+        return ee.data.getAsset(asset_id).get("properties", {})
+    except ee.EEException:
+        return None
+
+
+def _pending_images(asset_id: str) -> List[str]:
+    """Names of the images of `asset_id` whose export is still queued or running."""
+    pending = []
+    for op in ee.data.listOperations():
+        meta = op.get("metadata", {})
+        if meta.get("state") not in ("PENDING", "RUNNING"):
+            continue
+        for uri in meta.get("destinationUris", []):
+            # URIs end in ".../<asset_id>/<image>"; compare whole path parts
+            parent, _, name = uri.rpartition("/")
+            if parent == asset_id or parent.endswith(("/" + asset_id, "=" + asset_id)):
+                pending.append(name)
+    return pending
+
+
+def _run_key(aoi: ee.Geometry, **params) -> str:
+    """Hash of the AOI and run parameters, used to tie an asset to its inputs."""
+    payload = json.dumps(params, sort_keys=True) + aoi.serialize()
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _asset_ready(asset_id: str, run_key: str) -> bool:
+    """
+    True if `asset_id` was exported for `run_key`, holds every expected
+    image and has no exports into it still pending.
+    """
+    props = _asset_properties(asset_id)
+    if not props or props.get("run_key") != run_key or "expected_images" not in props:
+        return False
+    expected = set(filter(None, props["expected_images"].split(",")))
+    return expected <= set(_asset_images(asset_id)) and not _pending_images(asset_id)
+
+
+def export_flood_collection(
+    collection: ee.ImageCollection,
+    aoi: ee.Geometry,
+    asset_id: str,
+) -> List[ee.batch.Task]:
+    """
+    Export every image of a flood collection (output of opticflood_s2) into an
+    ImageCollection asset, so later opticflood_s2 calls with the same inputs
+    read the stored result instead of re-evaluating the whole chain.
+
+    Images are named by acquisition date. Dates already stored or still being
+    exported are skipped, so calling this again re-submits only dates whose
+    export failed or was cancelled. The run parameters of the collection are
+    written to the asset, and an asset created for other inputs is refused.
+
+    Returns:
+      The started export tasks (empty once every date is stored or pending).
+    """
+    info = ee.Dictionary({
+        "times": collection.aggregate_array("system:time_start").distinct(),
+        "run_key": collection.get("run_key"),
+    }).getInfo()
+    run_key = info.get("run_key")
+    if not run_key:
+        raise ValueError("collection has no 'run_key'; build it with opticflood_s2")
+
+    props = _asset_properties(asset_id)
+    if props is None:
+        ee.data.createAsset({"type": "IMAGE_COLLECTION"}, asset_id)
+    elif props.get("run_key") not in (None, run_key):
+        raise ValueError(f"{asset_id} was exported for different inputs; use a new asset id")
+
+    names = {}
+    for millis in info["times"] or []:
+        date = datetime.datetime.fromtimestamp(millis / 1000, datetime.timezone.utc)
+        names["flood_" + date.strftime("%Y%m%d")] = millis
+
+    ee.data.setAssetProperties(asset_id, {
+        "run_key": run_key,
+        "expected_images": ",".join(sorted(names)),
+    })
+
+    skip = set(_asset_images(asset_id)) | set(_pending_images(asset_id))
+    tasks = []
+    for name, millis in names.items():
+        if name in skip:
+            continue
+
+        img = ee.Image(collection.filter(ee.Filter.eq("system:time_start", millis)).first())
+        task = ee.batch.Export.image.toAsset(
+            image=img,
+            description=name,
+            assetId=f"{asset_id}/{name}",
+            region=aoi,
+            scale=10,
+            maxPixels=1e10,
+        )
+        task.start()
+        tasks.append(task)
+
+    return tasks
+
+
 # =========================================================
 # SENTINEL-2: Earth Engine pipeline (server-side)
 # =========================================================
@@ -69,6 +201,7 @@ def opticflood_s2(
     min_area: int = 10000,
     use_reference_for_permwater: bool = True,
     add_metadata: Optional[Dict[str, str]] = None,
+    export_asset_id: Optional[str] = None,
 ) -> ee.ImageCollection:
     """
     Sentinel-2 flood mapping using your existing EE helpers:
@@ -76,16 +209,33 @@ def opticflood_s2(
       2) load S2 collection (cloud-threshold filtered)
       3) compute NDWI + cloud mask (mask_clouds returns 1=cloud, 0=clear)
       4) mosaic by date (mosaic_s2)
-      5) KMeans classification (classify_kmeans) -> expected 1=flood, 0=dry
-      6) remove permanent water + clouds (mask them out)
+      5) KMeans NDWI threshold (kmeans_threshold)
+      6) flood = above threshold, not cloud, not permanent water (one expression)
       7) remove small patches (remove_small_area)
       8) tag fields + layer_name (add_layer_name)
 
+    The collection carries a 'run_key' property hashing the AOI and the
+    parameters above. If export_asset_id names an asset written by
+    export_flood_collection for the same run_key, with every date stored
+    and no exports pending, that asset is returned without recomputing.
+
     Returns:
       ee.ImageCollection with a single band 'depth' (1=flood) and masked non-flood.
     """
     _ensure_ee_initialized()
 
+    run_key = _run_key(
+        aoi,
+        flood_event_date=flood_event_date,
+        lag=lag,
+        cloud_threshold=cloud_threshold,
+        min_area=min_area,
+        use_reference_for_permwater=use_reference_for_permwater,
+        add_metadata=add_metadata,
+    )
+    if export_asset_id and _asset_ready(export_asset_id, run_key):
+        return ee.ImageCollection(export_asset_id)
+
     # 1) Dates
     post_start_date, post_end_date, ref_start_date, ref_end_date = get_date_ranges(
         flood_event_date, lag
@@ -110,25 +260,25 @@ def opticflood_s2(
     # 4) Mosaic by date (expects 'NDWI' and 'cloud_mask' in each image)
     mosaicked = mosaic_s2(ndwi_collection, aoi)
 
-    # 5) Classify + handle clouds & permanent water
+    # 5) Classify + handle clouds & permanent water in one fused expression
     def _classify_and_mask(img: ee.Image):
-        ndwi = img.select("NDWI")
-        cloud_mask_img = img.select("cloud_mask")  # 1=cloud, 0=clear
-
-        # Your EE helper: expects an Image + geometry; returns labeled image (1=flood, 0=dry)
-        classified = classify_kmeans(ndwi, aoi).rename("depth")
-
-        # Keep only flood (binary)
-        flood = classified.eq(1)
-
-        # Mask out permanent water entirely (unknown)
-        flood = flood.where(permanent_water.eq(1), 0)
-
-        # Mask out clouds (unknown)
-        flood = flood.where(cloud_mask_img.eq(1), 0)
-
-        cleaned = flood.updateMask(flood.eq(1)).rename("depth")
-        cleaned = cleaned.set("system:time_start", img.get("system:time_start"))
+        t = kmeans_threshold(img.select("NDWI"), aoi)  # NDWI > t = flood
+
+        flood = img.expression(
+            "(NDWI > T) && (CLOUD != 1) && (PW != 1)",
+            {
+                "NDWI": img.select("NDWI"),
+                "CLOUD": img.select("cloud_mask"),  # 1=cloud, 0=clear
+                "PW": permanent_water,
+                "T": ee.Image.constant(t),
+            },
+        )
+
+        cleaned = flood.selfMask().rename("depth")
+        cleaned = cleaned.set({
+            "system:time_start": img.get("system:time_start"),
+            "date": img.get("date"),
+        })
         return cleaned
 
     flood_ic = mosaicked.map(_classify_and_mask)
@@ -145,7 +295,8 @@ def opticflood_s2(
 
     flood_ic = flood_ic.map(_tag)
     final_collection = add_layer_name(flood_ic)
-    return final_collection
+
+    return final_collection.set("run_key", run_key)
 
 
 
@@ -154,3 +305,207 @@ def opticflood_s2(
         raise ValueError(f"No GeoTIFFs found in {input_dir}")
 
     return outputs
+
+
+# =========================================================
+# SENTINEL-2: download flood masks as NumPy arrays
+# =========================================================
+def _utm_crs(lon: float, lat: float) -> str:
+    """EPSG code of the WGS84 UTM zone containing (lon, lat)."""
+    zone = min(int((lon + 180) // 6) + 1, 60)
+    return f"EPSG:{32600 + zone if lat >= 0 else 32700 + zone}"
+
+
+def opticflood_s2_fetch(
+    collection: ee.ImageCollection,
+    aoi: ee.Geometry,
+    scale: int = 10,
+    max_workers: int = 8,
+    max_requests_per_second: float = 40,
+) -> List[np.ndarray]:
+    """
+    Download the 'depth' band of every image in `collection` (e.g. the output
+    of opticflood_s2) over the AOI bounds, issuing ee.data.computePixels
+    requests concurrently instead of one image at a time.
+
+    Requests are spaced to stay under EE's request-rate limit. Each request
+    is capped by EE (about 48 MB / 32768 px per side), so keep the AOI modest
+    or raise `scale`.
+
+    Returns:
+      One uint8 array per image (1=flood, 0=no flood), in collection order.
+    """
+    _ensure_ee_initialized()
+
+    # Shared pixel grid: AOI bounds in its UTM zone at `scale` metres
+    lon, lat = aoi.centroid(1).coordinates().getInfo()
+    crs = _utm_crs(lon, lat)
+    coords = aoi.bounds(1, crs).coordinates().getInfo()[0]
+    xs = [c[0] for c in coords]
+    ys = [c[1] for c in coords]
+    grid = {
+        "dimensions": {
+            "width": math.ceil((max(xs) - min(xs)) / scale),
+            "height": math.ceil((max(ys) - min(ys)) / scale),
+        },
+        "affineTransform": {
+            "scaleX": scale, "shearX": 0, "translateX": min(xs),
+            "shearY": 0, "scaleY": -scale, "translateY": max(ys),
+        },
+        "crsCode": crs,
+    }
+
+    n = collection.size().getInfo()
+    images = collection.toList(n)
+    requests = [
+        {
+            "expression": ee.Image(images.get(i)).select("depth").unmask(0).toByte(),
+            "fileFormat": "NUMPY_NDARRAY",
+            "bandIds": ["depth"],
+            "grid": grid,
+        }
+        for i in range(n)
+    ]
+
+    # Space request starts to respect the rate limit
+    lock = threading.Lock()
+    next_slot = [0.0]
+
+    def _fetch(request):
+        with lock:
+            now = time.monotonic()
+            wait = next_slot[0] - now
+            next_slot[0] = max(now, next_slot[0]) + 1.0 / max_requests_per_second
+        if wait > 0:
+            time.sleep(wait)
+        return ee.data.computePixels(request)["depth"]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_fetch, requests))
+
+
+# =========================================================
+# SKYSAT: local raster pipeline (no EE)
+# =========================================================
+# SkySat analytic band order: Blue, Green, Red, NIR
+SK_GREEN_BAND = 2
+SK_NIR_BAND = 4
+
+
+def _iter_blocks(src, roi_geom, indexes=(SK_GREEN_BAND, SK_NIR_BAND)):
+    """
+    Yield (window, bands) for each internal block of `src` that overlaps the ROI,
+    so only one block is in memory at a time. Blocks without valid data are skipped.
+
+    `bands` is float32 with shape (len(indexes), rows, cols); no-data pixels
+    (in any of the read bands) and pixels outside the ROI polygon are NaN.
+    `roi_geom` must be in the raster CRS.
+    """
+    roi_window = features.geometry_window(src, [roi_geom])
+
+    for _, win in src.block_windows(1):
+        if not windows.intersect(win, roi_window):
+            continue
+        win = win.intersection(roi_window)
+        valid = src.read_masks(list(indexes), window=win).min(axis=0)
+        if not valid.any():
+            continue
+
+        arr = src.read(indexes=list(indexes), window=win, out_dtype="float32")
+        outside = features.geometry_mask(
+            [roi_geom],
+            out_shape=(int(win.height), int(win.width)),
+            transform=src.window_transform(win),
+        )
+        arr[:, (valid == 0) | outside] = np.nan
+        yield win, arr
+
+
+def ndwi(green: np.ndarray, nir: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    NDWI = (green - nir) / (green + nir), evaluated in one fused numexpr pass
+    (no temporaries). Written into `out` if given, else a new float32 array.
+    """
+    import numexpr as ne  # local path only
+
+    if out is None:
+        out = np.empty(green.shape, dtype=np.float32)
+    ne.evaluate(
+        "(g - n) / (g + n + 1e-12)",
+        local_dict={"g": green, "n": nir},
+        out=out,
+    )
+    return out
+
+
+def sk_ndwi_local(src_path: str, roi_geom: Dict, out_path: str) -> str:
+    """
+    Compute NDWI for a SkySat scene block by block and write it to `out_path`
+    (float32, NaN = no data) using the same internal tiling as the source.
+    """
+    with rasterio.open(src_path) as src:
+        profile = src.profile.copy()
+        profile.pop("photometric", None)
+        profile.update(count=1, dtype="float32", nodata=np.nan)
+
+        with rasterio.open(out_path, "w", **profile) as dst:
+            for win, (green, nir) in _iter_blocks(src, roi_geom):
+                dst.write(ndwi(green, nir), 1, window=win)
+
+    return out_path
+
+
+def opticflood_sk_local(
+    src_path: str,
+    roi_geom: Dict,
+    out_path: str,
+    min_area: int = 10000,
+    merge_small: bool = False,
+) -> str:
+    """
+    SkySat flood mapping, fully local:
+      1) NDWI per block, quantized to int16, accumulating a scene-wide histogram
+      2) Otsu threshold on that histogram
+      3) flood = NDWI > threshold (second block pass)
+      4) remove small patches (remove_small_area_local), or with merge_small
+         merge small flood/dry patches into their largest neighbour
+         (sieve_merge_neighbors)
+      5) write a uint8 'depth' GeoTIFF (1=flood, 0=no flood/no data)
+
+    Returns:
+      Path of the written flood mask.
+    """
+    with rasterio.open(src_path) as src:
+        min_pixels = int(round(min_area / abs(src.res[0] * src.res[1])))
+
+        # 1-2) Threshold from the whole ROI, one block at a time
+        hist = np.zeros(NDWI_LEVELS, dtype=np.int64)
+        for _, (green, nir) in _iter_blocks(src, roi_geom):
+            hist += ndwi_histogram(quantize_ndwi(green, nir))
+        t = quantized_otsu_threshold(hist)
+
+        # 3) Binary flood mask, sized to the ROI window rather than the scene
+        roi_window = features.geometry_window(src, [roi_geom])
+        row0, col0 = int(roi_window.row_off), int(roi_window.col_off)
+        flood = np.zeros((int(roi_window.height), int(roi_window.width)), dtype=np.uint8)
+        for win, (green, nir) in _iter_blocks(src, roi_geom):
+            r, c = int(win.row_off) - row0, int(win.col_off) - col0
+            h, w = green.shape
+            flood[r:r + h, c:c + w] = quantize_ndwi(green, nir) > t
+
+        profile = src.profile.copy()
+
+    # 4) Remove small patches
+    if merge_small:
+        flood = sieve_merge_neighbors(flood, min_pixels)
+    else:
+        flood = remove_small_area_local(flood, min_pixels)
+
+    # 5) Write into the ROI window of a full-size output (the rest reads as 0)
+    profile.pop("photometric", None)
+    profile.update(count=1, dtype="uint8", nodata=0)
+    with rasterio.open(out_path, "w", **profile) as dst:
+        dst.write(flood, 1, window=roi_window)
+        dst.set_band_description(1, "depth")
+
+    return out_path
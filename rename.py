@@ -14,7 +14,7 @@ def add_layer_name(collection, prefix="Flood extent on "):
     def set_layer_name(img):
         date_str = ee.Date(img.get('system:time_start')).format('YYYY-MM-dd')
         source = ee.String(img.get('source'))  # Must be set beforehand
-        layer_name = ee.String(prefix).cat(date_str).cat(" (").cat(source).cat(")")
+        layer_name = ee.List([prefix, date_str, " (", source, ")"]).join("")
         return img.set('layer_name', layer_name)
 
     return collection.map(set_layer_name)
@@ -0,0 +1,244 @@
+"""
+Local (NumPy) flood mask sieves for downloaded or SkySat rasters.
+Needs numpy and scipy; numba is only imported for very large masks.
+"""
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+from scipy import ndimage as ndi
+
+# Above this many pixels the parallel numba CCL (ccl.py) beats scipy
+_LARGE_MASK_PIXELS = 4_000_000
+
+# Reusable work arrays for the local sieve: one per (shape, dtype), least
+# recently used evicted first once the pool exceeds _BUFFER_POOL_BYTES
+_BUFFER_POOL_BYTES = 256 * 2**20
+_BUFFERS = OrderedDict()
+
+
+def _get_buf(shape, dtype):
+    arr = _BUFFERS.pop((tuple(shape), np.dtype(dtype)), None)
+    return arr if arr is not None else np.empty(shape, dtype=dtype)
+
+
+def _put_buf(arr):
+    if arr.nbytes > _BUFFER_POOL_BYTES:
+        return
+    _BUFFERS[(arr.shape, arr.dtype)] = arr
+
+    total = sum(a.nbytes for a in _BUFFERS.values())
+    while total > _BUFFER_POOL_BYTES:
+        _, evicted = _BUFFERS.popitem(last=False)
+        total -= evicted.nbytes
+
+
+def clear_buffers():
+    """Release all pooled local-sieve work arrays (e.g. after a large scene)."""
+    _BUFFERS.clear()
+
+
+# Set bits per byte, for NumPy < 2.0 (no np.bitwise_count)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Busy row runs closer than this are sieved as one slice
+_SPAN_GAP_ROWS = 256
+
+
+def _row_counts(arr):
+    """Flood pixels per row, counted on the bit-packed mask."""
+    packed = np.packbits(arr, axis=1)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(packed).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT[packed].sum(axis=1, dtype=np.int64)
+
+
+def _busy_row_spans(arr, min_pixels):
+    """
+    Row ranges [r0, r1) that can hold a patch of min_pixels or more.
+    Patches never cross an all-dry row, so each run of non-empty rows is
+    independent and runs with fewer than min_pixels flood pixels are skipped.
+    """
+    counts = _row_counts(arr)
+    steps = np.diff(np.r_[0, (counts > 0).astype(np.int8), 0])
+    starts = np.flatnonzero(steps == 1)
+    ends = np.flatnonzero(steps == -1)
+
+    totals = np.r_[0, np.cumsum(counts)]
+    keep = totals[ends] - totals[starts] >= min_pixels
+
+    spans = []
+    for r0, r1 in zip(starts[keep], ends[keep]):
+        if spans and r0 - spans[-1][1] < _SPAN_GAP_ROWS:
+            spans[-1][1] = r1
+        else:
+            spans.append([r0, r1])
+    return spans
+
+
+# -----------------------------
+# Remove Small Flood Areas (local raster)
+# -----------------------------
+def remove_small_area_local(arr, min_pixels, connectivity=8, out=None):
+    """
+    Sieve a local binary flood mask, keeping patches of at least min_pixels.
+    Preferred over remove_small_area when min_pixels exceeds the EE limit.
+
+    Args:
+        arr (np.ndarray): 2-D binary flood mask (0 = dry, 1 = flood).
+        min_pixels (int): Minimum patch size to retain (in pixels).
+        connectivity (int): 8 or 4 neighbour connectivity (default 8).
+        out (np.ndarray, optional): uint8 array to write the result into;
+            pass the same array across tiles to avoid reallocating it.
+
+    Returns:
+        np.ndarray: uint8 mask with small patches removed.
+    """
+    if out is None:
+        out = np.empty(arr.shape, dtype=np.uint8)
+    out.fill(0)
+
+    # Only label row spans that can contain a large enough patch
+    spans = _busy_row_spans(arr, min_pixels)
+    use_ccl = connectivity == 8 and any(
+        (r1 - r0) * arr.shape[1] > _LARGE_MASK_PIXELS for r0, r1 in spans
+    )
+
+    # Work arrays come from a reusable pool (see clear_buffers): intp labels,
+    # so np.take gathers without an index copy, and the numba CCL parent array
+    labels = _get_buf(arr.shape, np.intp)
+    parent = _get_buf((arr.size + 1,), np.int32) if use_ccl else None
+    try:
+        for r0, r1 in spans:
+            _sieve_rows(arr[r0:r1], min_pixels, connectivity, labels[r0:r1], out[r0:r1], parent)
+    finally:
+        _put_buf(labels)
+        if parent is not None:
+            _put_buf(parent)
+
+    return out
+
+
+def _sieve_rows(arr, min_pixels, connectivity, labels, out, parent=None):
+    if parent is not None and connectivity == 8 and arr.size > _LARGE_MASK_PIXELS:
+        from ccl import label_8conn  # numba is only needed for large masks
+        label_8conn(arr, out=labels, parent=parent)
+    else:
+        if connectivity == 8:
+            structure = np.ones((3, 3), dtype=bool)
+        else:
+            structure = ndi.generate_binary_structure(2, 1)
+        ndi.label(arr, structure=structure, output=labels)
+    sizes = np.bincount(labels.ravel())
+
+    # Label -> keep LUT, gathered straight into the uint8 output
+    lut = (sizes >= min_pixels).astype(np.uint8)
+    lut[0] = 0  # background
+    np.take(lut, labels, mode='clip', out=out)
+
+
+# -----------------------------
+# Merge Small Areas into Neighbours (local raster)
+# -----------------------------
+def _label_classes(mask, fg_structure, bg_structure):
+    """One label image for both classes: flood 1..n_fg, dry n_fg+1..n."""
+    labels, n_fg = ndi.label(mask, structure=fg_structure, output=np.intp)
+    bg, n_bg = ndi.label(1 - mask, structure=bg_structure, output=np.intp)
+    bg += n_fg
+    np.copyto(labels, bg, where=mask == 0)
+    return labels, n_fg, n_fg + n_bg
+
+
+def sieve_merge_neighbors(arr, min_pixels, connectivity=8, max_iter=5):
+    """
+    GDAL-style sieve of a local binary flood mask: flood and dry patches
+    smaller than min_pixels are merged into their largest neighbouring patch
+    instead of being dropped, so small dry holes inside floods are filled too.
+
+    Flood patches use `connectivity`; dry patches use the complementary one
+    (8 -> 4, 4 -> 8), so a diagonal flood link is never also a dry link.
+    Merging can expose new small patches; if some remain after max_iter
+    rounds a RuntimeWarning is issued and the partial result returned.
+
+    Args:
+        arr (np.ndarray): 2-D binary flood mask (0 = dry, 1 = flood).
+        min_pixels (int): Minimum patch size to retain (in pixels).
+        connectivity (int): 8 or 4 neighbour connectivity of flood patches (default 8).
+        max_iter (int): Maximum merge rounds (default 5).
+
+    Returns:
+        np.ndarray: uint8 mask with small patches merged away.
+    """
+    four = ndi.generate_binary_structure(2, 1)
+    eight = np.ones((3, 3), dtype=bool)
+    fg_structure, bg_structure = (eight, four) if connectivity == 8 else (four, eight)
+    out = (arr > 0).astype(np.uint8)
+
+    for _ in range(max_iter):
+        labels, n_fg, n = _label_classes(out, fg_structure, bg_structure)
+
+        sizes = np.bincount(labels.ravel(), minlength=n + 1)
+        small = sizes < min_pixels
+        small[0] = False
+        if not small.any():
+            break
+
+        # Region adjacency from right and down neighbours: with complementary
+        # connectivities every flood/dry contact includes a 4-neighbour pair.
+        # Only pixel pairs across a boundary that touches a small region are kept
+        us, vs = [], []
+        for a, b in ((labels[:, :-1], labels[:, 1:]), (labels[:-1], labels[1:])):
+            a, b = a[a != b], b[a != b]
+            touch = small[a] | small[b]
+            us.append(a[touch])
+            vs.append(b[touch])
+        a, b = np.concatenate(us), np.concatenate(vs)
+
+        # Both directions, with the small region first
+        u = np.concatenate([a, b])
+        v = np.concatenate([b, a])
+        first_small = small[u]
+        u, v = u[first_small], v[first_small]
+        if not len(u):
+            break
+
+        # Largest neighbour of each small region (ties -> highest label)
+        order = np.lexsort((v, sizes[v], u))
+        u, v = u[order], v[order]
+        last = np.r_[u[1:] != u[:-1], True]
+        u, v = u[last], v[last]
+
+        parent = np.arange(n + 1)
+        parent[u] = v
+
+        # Two small regions pointing at each other: the larger stays root
+        mutual = parent[v] == u
+        root = mutual & ((sizes[u] > sizes[v]) | ((sizes[u] == sizes[v]) & (u > v)))
+        parent[u[root]] = u[root]
+
+        # Resolve merge chains by pointer jumping
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+        classes = np.zeros(n + 1, dtype=np.uint8)
+        classes[1:n_fg + 1] = 1
+        merged = np.empty(labels.shape, dtype=np.uint8)
+        np.take(classes[parent], labels, mode='clip', out=merged)
+        if np.array_equal(merged, out):
+            break
+        out = merged
+    else:
+        labels, _, n = _label_classes(out, fg_structure, bg_structure)
+        sizes = np.bincount(labels.ravel(), minlength=n + 1)
+        n_small = int(np.count_nonzero(sizes[1:] < min_pixels))
+        if n_small and n > 1:  # a lone region has nothing to merge into
+            warnings.warn(
+                f"sieve_merge_neighbors: {n_small} patches below {min_pixels} pixels "
+                f"remain after max_iter={max_iter} rounds",
+                RuntimeWarning,
+            )
+
+    return out
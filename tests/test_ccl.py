@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+
+from ccl import _label_8conn, label_8conn
+
+EIGHT = np.ones((3, 3), dtype=bool)
+
+
+def _same_partition(labels, expected, n, n_expected, binary):
+    assert n == n_expected
+    assert ((labels > 0) == (binary > 0)).all()
+    fg = binary > 0
+    if fg.any():
+        # One-to-one mapping between our labels and scipy's
+        pairs = set(zip(labels[fg].tolist(), expected[fg].tolist()))
+        assert len(pairs) == n
+    assert labels.max(initial=0) == n
+
+
+@pytest.mark.parametrize("shape", [(1, 1), (1, 50), (50, 1), (2, 2), (37, 23), (200, 131)])
+@pytest.mark.parametrize("density", [0.2, 0.5, 0.7])
+def test_label_8conn_matches_scipy(shape, density):
+    rng = np.random.default_rng(hash((shape, density)) % 2**32)
+    binary = (rng.random(shape) < density).astype(np.uint8)
+
+    labels, n = label_8conn(binary)
+    expected, n_expected = ndi.label(binary, structure=EIGHT)
+    _same_partition(labels, expected, n, n_expected, binary)
+
+
+@pytest.mark.parametrize("n_strips", [1, 2, 3, 7, 40])
+def test_label_8conn_strip_seams(n_strips):
+    rng = np.random.default_rng(n_strips)
+    binary = (rng.random((40, 61)) < 0.5).astype(np.uint8)
+    # Diagonal-only links across every row, so components span all seams
+    binary[np.arange(40), np.arange(40)] = 1
+
+    labels = np.empty(binary.shape, dtype=np.intp)
+    parent = np.empty(binary.size + 1, dtype=np.int32)
+    n = _label_8conn(binary, n_strips, labels, parent)
+
+    expected, n_expected = ndi.label(binary, structure=EIGHT)
+    _same_partition(labels, expected, n, n_expected, binary)
+
+
+def test_label_8conn_empty_and_full():
+    for fill in (0, 1):
+        binary = np.full((9, 4), fill, dtype=np.uint8)
+        labels, n = label_8conn(binary)
+        assert n == fill
+        assert (labels == fill).all()
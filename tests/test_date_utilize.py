@@ -0,0 +1,13 @@
+from date_utilize import get_date_ranges
+
+
+def test_get_date_ranges_defaults():
+    assert get_date_ranges("2023-02-28", 10) == (
+        "2023-03-01", "2023-03-10", "2023-01-29", "2023-02-27",
+    )
+
+
+def test_get_date_ranges_custom_reference_window():
+    assert get_date_ranges("2024-01-01", 3, days_before_start=10, days_before_end=5) == (
+        "2024-01-02", "2024-01-04", "2023-12-22", "2023-12-27",
+    )
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from scipy import ndimage as ndi
+
+import sieve
+from sieve import remove_small_area_local, sieve_merge_neighbors
+
+EIGHT = np.ones((3, 3), dtype=bool)
+FOUR = ndi.generate_binary_structure(2, 1)
+
+
+def _reference_sieve(arr, min_pixels, structure):
+    labels, _ = ndi.label(arr, structure=structure)
+    keep = np.bincount(labels.ravel()) >= min_pixels
+    keep[0] = False
+    return keep[labels].astype(np.uint8)
+
+
+def _sparse_rows_mask(seed):
+    """Random blobs in row bands separated by all-dry rows of varying height."""
+    rng = np.random.default_rng(seed)
+    arr = (rng.random((300, 97)) < 0.45).astype(np.uint8)
+    for r0, r1 in ((0, 40), (60, 61), (70, 150), (155, 158), (200, 290)):
+        arr[r0:r1] = 0
+    arr[20, :3] = 1  # a short isolated row run that is skipped outright
+    return arr
+
+
+@pytest.mark.parametrize("connectivity, structure", [(8, EIGHT), (4, FOUR)])
+@pytest.mark.parametrize("min_pixels", [1, 5, 40])
+@pytest.mark.parametrize("gap_rows", [1, 256])
+def test_remove_small_area_local_matches_scipy(monkeypatch, connectivity, structure, min_pixels, gap_rows):
+    monkeypatch.setattr(sieve, "_SPAN_GAP_ROWS", gap_rows)
+    for seed in range(3):
+        arr = _sparse_rows_mask(seed)
+        out = remove_small_area_local(arr, min_pixels, connectivity=connectivity)
+        assert out.dtype == np.uint8
+        np.testing.assert_array_equal(out, _reference_sieve(arr, min_pixels, structure))
+
+
+def test_remove_small_area_local_numba_path(monkeypatch):
+    pytest.importorskip("numba")
+    monkeypatch.setattr(sieve, "_LARGE_MASK_PIXELS", 0)
+    monkeypatch.setattr(sieve, "_SPAN_GAP_ROWS", 1)
+    arr = _sparse_rows_mask(7)
+
+    out = np.full(arr.shape, 9, dtype=np.uint8)  # stale contents must be cleared
+    remove_small_area_local(arr, 12, out=out)
+    np.testing.assert_array_equal(out, _reference_sieve(arr, 12, EIGHT))
+
+
+def test_remove_small_area_local_empty_and_full():
+    for fill in (0, 1):
+        arr = np.full((20, 30), fill, dtype=np.uint8)
+        assert (remove_small_area_local(arr, 10) == fill).all()
+        assert not remove_small_area_local(arr, arr.size + 1).any()
+
+
+def test_buffer_pool_is_bounded(monkeypatch):
+    monkeypatch.setattr(sieve, "_BUFFER_POOL_BYTES", 64 * 1024)
+    sieve.clear_buffers()
+    for rows in range(10, 60, 10):
+        remove_small_area_local(np.ones((rows, 50), dtype=np.uint8), 1)
+    assert sum(a.nbytes for a in sieve._BUFFERS.values()) <= 64 * 1024
+    sieve.clear_buffers()
+    assert not sieve._BUFFERS
+
+
+@pytest.mark.parametrize("connectivity", [8, 4])
+def test_sieve_merge_neighbors_leaves_no_small_patch(connectivity):
+    fg, bg = (EIGHT, FOUR) if connectivity == 8 else (FOUR, EIGHT)
+    rng = np.random.default_rng(connectivity)
+    for _ in range(5):
+        arr = (ndi.gaussian_filter(rng.random((90, 110)), 2) > 0.5).astype(np.uint8)
+        arr ^= (rng.random(arr.shape) < 0.02).astype(np.uint8)  # speckle
+
+        out = sieve_merge_neighbors(arr, 15, connectivity=connectivity, max_iter=50)
+        for mask, structure in ((out, fg), (1 - out, bg)):
+            labels, _ = ndi.label(mask, structure=structure)
+            assert (np.bincount(labels.ravel())[1:] >= 15).all()
+
+
+def test_sieve_merge_neighbors_fills_small_hole():
+    arr = np.zeros((30, 30), dtype=np.uint8)
+    arr[5:25, 5:25] = 1
+    arr[14:16, 14:16] = 0  # 4-pixel dry hole inside the flood
+    arr[0, 29] = 1         # 1-pixel flood speck in dry land
+
+    out = sieve_merge_neighbors(arr, 10)
+    expected = np.zeros_like(arr)
+    expected[5:25, 5:25] = 1
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_sieve_merge_neighbors_warns_when_max_iter_exhausted():
+    arr = np.array([
+        [1, 1, 0, 1, 0, 0, 1, 0, 0, 0, 0],
+        [0, 1, 0, 1, 0, 0, 1, 0, 0, 0, 0],
+    ], dtype=np.uint8)
+    with pytest.warns(RuntimeWarning, match="max_iter=1"):
+        sieve_merge_neighbors(arr, 24, max_iter=1)
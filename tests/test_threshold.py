@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("ee")
+from threshold import (  # noqa: E402
+    NDWI_LEVELS, NDWI_NODATA, NDWI_SCALE,
+    ndwi_histogram, quantize_ndwi, quantized_otsu_threshold,
+)
+
+
+def test_ndwi_histogram_offset_binary_mapping():
+    q = np.array([NDWI_NODATA, -NDWI_SCALE, NDWI_SCALE, 0, 0, 1, -1], dtype=np.int16)
+    hist = ndwi_histogram(q)
+
+    assert hist.shape == (NDWI_LEVELS,)
+    assert hist.sum() == 6  # no data is not counted
+    assert hist[0] == 1     # -10000
+    assert hist[-1] == 1    # +10000
+    assert hist[NDWI_SCALE] == 2
+    assert hist[NDWI_SCALE + 1] == 1
+    assert hist[NDWI_SCALE - 1] == 1
+
+
+def test_quantize_ndwi():
+    pytest.importorskip("numexpr")
+    green = np.array([1.0, 0.0, 3.0, 1.0, np.nan, 2.0], dtype=np.float32)
+    nir = np.array([0.0, 1.0, 1.0, 1.0, 1.0, np.nan], dtype=np.float32)
+
+    q = quantize_ndwi(green, nir)
+    assert q.dtype == np.int16
+    np.testing.assert_array_equal(q, [NDWI_SCALE, -NDWI_SCALE, 5000, 0, NDWI_NODATA, NDWI_NODATA])
+
+
+def test_quantized_otsu_threshold_bimodal():
+    rng = np.random.default_rng(0)
+    dry = np.clip(rng.normal(-3000, 500, 6000), -NDWI_SCALE, NDWI_SCALE)
+    water = np.clip(rng.normal(4000, 500, 3000), -NDWI_SCALE, NDWI_SCALE)
+    q = np.rint(np.r_[dry, water]).astype(np.int16)
+
+    t = quantized_otsu_threshold(ndwi_histogram(q))
+    assert isinstance(t, int)
+    assert dry.max() <= t < water.min()
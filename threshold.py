@@ -1,19 +1,15 @@
 import ee
+import numpy as np
 
 # -----------------------------
-# KMeans Classification on NDWI
+# KMeans Clusters on NDWI
 # -----------------------------
-def classify_kmeans(ndwi_img, aoi, n_clusters=2):
+def _cluster_ndwi(ndwi_img, aoi, n_clusters):
     """
-    Classifies an NDWI image using KMeans clustering.
-
-    Args:
-        ndwi_img (ee.Image): Image with NDWI band named 'NDWI'.
-        aoi (ee.Geometry): Area of interest for sampling and classification.
-        n_clusters (int): Number of clusters (default is 2).
+    Cluster an NDWI image with KMeans and compute mean NDWI per cluster.
 
     Returns:
-        ee.Image: Binary flood mask with 'flood_class' band (1 = flood, 0 = non-flood).
+        (ee.Image, ee.List): Cluster image and list of {'cluster', 'mean'} dicts.
     """
     training = ndwi_img.sample(
         region=aoi,
@@ -25,20 +21,146 @@ def classify_kmeans(ndwi_img, aoi, n_clusters=2):
     clusterer = ee.Clusterer.wekaKMeans(n_clusters).train(training)
     clustered = ndwi_img.cluster(clusterer).rename('raw_cluster')
     
-    # Compute mean NDWI per cluster
-    means = []
-    for i in range(n_clusters):
-        cluster_mask = clustered.eq(i)
-        masked_ndwi = ndwi_img.updateMask(cluster_mask)
-        mean_ndwi = masked_ndwi.reduceRegion(
-            reducer=ee.Reducer.mean(),
-            geometry=aoi,
-            scale=10,
-            maxPixels=1e8
-        ).get('NDWI')
-        means.append(ee.Number(mean_ndwi))
-
-    flood_cluster = ee.List(means).indexOf(ee.List(means).reduce(ee.Reducer.max()))
+    # Mean NDWI per cluster in a single grouped reduction
+    stacked = clustered.addBands(ndwi_img.select('NDWI'))
+    groups = ee.List(stacked.reduceRegion(
+        reducer=ee.Reducer.mean().group(groupField=0, groupName='cluster'),
+        geometry=aoi,
+        scale=10,
+        maxPixels=1e8
+    ).get('groups'))
+
+    return clustered, groups
+
+
+# -----------------------------
+# KMeans Classification on NDWI
+# -----------------------------
+def classify_kmeans(ndwi_img, aoi, n_clusters=2):
+    """
+    Classifies an NDWI image using KMeans clustering.
+
+    Args:
+        ndwi_img (ee.Image): Image with NDWI band named 'NDWI'.
+        aoi (ee.Geometry): Area of interest for sampling and classification.
+        n_clusters (int): Number of clusters (default is 2).
+
+    Returns:
+        ee.Image: Binary flood mask with 'flood_class' band (1 = flood, 0 = non-flood).
+    """
+    clustered, groups = _cluster_ndwi(ndwi_img, aoi, n_clusters)
+
+    # Flood cluster = cluster with the highest mean NDWI
+    means = groups.map(lambda g: ee.Dictionary(g).get('mean'))
+    wettest = ee.Dictionary(groups.get(means.indexOf(means.reduce(ee.Reducer.max()))))
+    flood_cluster = ee.Number(wettest.get('cluster'))
+
     flood_mask = clustered.eq(flood_cluster).rename('flood_class')
 
     return flood_mask.set('system:time_start', ndwi_img.get('system:time_start'))
+
+
+# -----------------------------
+# KMeans Threshold on NDWI
+# -----------------------------
+def kmeans_threshold(ndwi_img, aoi, n_clusters=2):
+    """
+    NDWI threshold equivalent to the KMeans flood cluster: the midpoint
+    between the two highest cluster means (NDWI > threshold = flood).
+    If only one cluster is found its mean is used; with no valid pixels
+    the threshold is 1, so nothing is flagged as flood.
+
+    Args:
+        ndwi_img (ee.Image): Image with NDWI band named 'NDWI'.
+        aoi (ee.Geometry): Area of interest for sampling.
+        n_clusters (int): Number of clusters (default is 2).
+
+    Returns:
+        ee.Number: NDWI threshold.
+    """
+    _, groups = _cluster_ndwi(ndwi_img, aoi, n_clusters)
+
+    means = groups.map(lambda g: ee.Dictionary(g).get('mean')).sort()
+    n_means = means.size()
+    return ee.Number(ee.Algorithms.If(
+        n_means.gte(2),
+        ee.Number(means.get(-1)).add(means.get(-2)).divide(2),
+        ee.Algorithms.If(n_means.eq(1), means.get(0), 1)
+    ))
+
+
+# -----------------------------
+# Otsu Threshold on NDWI (local raster)
+# -----------------------------
+# NDWI is stored as int16: round(ndwi * NDWI_SCALE), no data = NDWI_NODATA
+NDWI_SCALE = 10000
+NDWI_NODATA = -32768
+NDWI_LEVELS = 2 * NDWI_SCALE + 1
+
+
+def quantize_ndwi(green, nir, out=None):
+    """
+    NDWI = (green - nir) / (green + nir), quantized to int16 (x 10000, rounded
+    half up) in one fused numexpr pass, so no float NDWI array is
+    materialized. This halves the bytes moved by the threshold and sieve passes.
+
+    Args:
+        green (np.ndarray): Float green band (NaN = no data).
+        nir (np.ndarray): Float NIR band (NaN = no data).
+        out (np.ndarray, optional): int16 output array.
+
+    Returns:
+        np.ndarray: int16 quantized NDWI (NDWI_NODATA where either band is NaN).
+    """
+    import numexpr as ne  # local path only
+
+    if out is None:
+        out = np.empty(green.shape, dtype=np.int16)
+    ne.evaluate(
+        "where((g == g) & (n == n), floor(s * (g - n) / (g + n + 1e-12) + 0.5), nodata)",
+        local_dict={"g": green, "n": nir, "s": NDWI_SCALE, "nodata": NDWI_NODATA},
+        out=out,
+        casting="unsafe",
+    )
+    return out
+
+
+def ndwi_histogram(q):
+    """
+    Count of each quantized NDWI level (-10000..10000), ignoring no data.
+    Histograms of separate blocks can be summed before thresholding.
+
+    Args:
+        q (np.ndarray): int16 quantized NDWI (see quantize_ndwi).
+
+    Returns:
+        np.ndarray: NDWI_LEVELS counts.
+    """
+    # Offset-binary view: NDWI_NODATA maps to 0, level v to v + 32768
+    idx = q.view(np.uint16) ^ np.uint16(0x8000)
+    counts = np.bincount(idx.ravel(), minlength=1 << 16)
+    return counts[32768 - NDWI_SCALE:32768 + NDWI_SCALE + 1]
+
+
+def quantized_otsu_threshold(hist):
+    """
+    Otsu threshold on a quantized NDWI histogram (see ndwi_histogram);
+    replaces KMeans on the 1-D NDWI feature with a single histogram scan.
+
+    Args:
+        hist (np.ndarray): NDWI_LEVELS counts, one bin per quantized level.
+
+    Returns:
+        int: Threshold t in quantized units (flood = q > t).
+    """
+    levels = np.arange(-NDWI_SCALE, NDWI_SCALE + 1, dtype=np.float64)
+
+    p = hist.astype(np.float64)
+    p /= p.sum()
+    omega = np.cumsum(p)
+    mu = np.cumsum(p * levels)
+    mu_t = mu[-1]
+
+    # Between-class variance for a split after each level
+    sigma_b2 = (mu_t * omega - mu) ** 2 / (omega * (1 - omega) + 1e-12)
+    return int(levels[np.argmax(sigma_b2)])
@@ -1,3 +1,6 @@
+import functools
+import json
+
 import ee
 
 # -----------------------------
@@ -6,6 +9,7 @@ import ee
 def load_s2_collection(aoi, start_date, end_date, cloud_threshold=100):
     """
     Load Sentinel-2 L2A image collection for a given area and date range, filtered by cloud cover.
+    Collections for client-side (fixed) AOIs are cached and reused across calls.
 
     Args:
         aoi (ee.Geometry): Area of interest to clip images to.
@@ -16,18 +20,32 @@ def load_s2_collection(aoi, start_date, end_date, cloud_threshold=100):
     Returns:
         ee.ImageCollection: Filtered and clipped image collection.
     """
-    bands = ['B3', 'B8', 'SCL']  # Green, NIR, and Scene Classification Layer
+    try:
+        aoi_geojson = aoi.toGeoJSONString()
+    except ee.EEException:
+        # Computed geometry: no client-side key to cache on
+        return _build_s2_collection(aoi, start_date, end_date, cloud_threshold)
+
+    return _cached_s2_collection(aoi_geojson, start_date, end_date, cloud_threshold)
+
 
-    def clip(img):
-        return img.clip(aoi).copyProperties(img, img.propertyNames())
+@functools.lru_cache(maxsize=64)
+def _cached_s2_collection(aoi_geojson, start_date, end_date, cloud_threshold):
+    aoi = ee.Geometry(json.loads(aoi_geojson))
+    return _build_s2_collection(aoi, start_date, end_date, cloud_threshold)
+
+
+def _build_s2_collection(aoi, start_date, end_date, cloud_threshold):
+    bands = ['B3', 'B8', 'SCL']  # Green, NIR, and Scene Classification Layer
 
+    # clip() keeps image properties, so no copyProperties node is needed
     collection = (
         ee.ImageCollection("COPERNICUS/S2_SR_HARMONIZED")
         .filterBounds(aoi)
         .filterDate(start_date, end_date)
         .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', cloud_threshold))
         .select(bands)
-        .map(clip)
+        .map(lambda img: img.clip(aoi))
     )
 
     return collection
@@ -36,6 +54,7 @@ def load_s2_collection(aoi, start_date, end_date, cloud_threshold=100):
 # -----------------------------
 # Permanent Water Mask (JRC)
 # -----------------------------
+@functools.lru_cache(maxsize=64)
 def get_permanent_water(reference_date):
     """
     Generate a mask of permanent water bodies from the JRC Global Surface Water dataset.
@@ -45,6 +64,7 @@ def get_permanent_water(reference_date):
 
     Returns:
         ee.Image: A binary mask where 1 indicates permanent water (present at least once in the last 5 years).
+                  Cached per reference_date.
     """
     water_history = (
         ee.ImageCollection("JRC/GSW1_4/YearlyHistory")